@@ -3,14 +3,93 @@ HEX檔案解析模組
 用於解析包含HEX字串的檔案，並轉換為可發送的資料格式
 """
 
-import re
-from typing import List, Tuple
+import json
+import mmap
+import os
+from array import array
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+
+_HEX_DIGITS = b'0123456789abcdefABCDEF'
+
+# bytes.translate 用的刪除清單：一次移除所有非十六進制字符（C層級迴圈，取代逐行regex）
+_DELETE_BYTES = bytes(c for c in range(256) if c not in _HEX_DIGITS)
+
+# str.strip()視為空白的ASCII字元，含bytes.strip()預設不處理的\x1c-\x1f
+_ASCII_WHITESPACE = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
 
 
 class HexParser:
+    # 每次從檔案讀取的區塊大小，以大區塊分攤read()呼叫的成本
+    READ_CHUNK_SIZE = 1 << 20
+    
+    # 資料開頭四個bytes對應的延遲時間(毫秒)
+    DELAY_TABLE = {
+        b'\x60\x01\x13\x20': 1000,  # "60 01 13 20"
+        b'\x60\x01\x13\x30': 10,    # "60 01 13 30"
+    }
+    DEFAULT_DELAY_MS = 10           # 其他資料的預設延遲
+    
+    # 資料筆數快取檔的副檔名，存放於HEX檔案旁
+    META_SUFFIX = '.meta.json'
+    
     def __init__(self, filename: str):
         self.filename = filename
-        self.hex_data = []
+        self.hex_data: List[Tuple[bytes, int]] = []
+        
+        # 緊湊儲存格式：所有資料連續存放，索引為 (offset, length, delay_ms) 三元組
+        self.packet_buffer = bytearray()
+        self.packet_index = array('I')
+        
+        # 可重複走訪的解析狀態：檔案只開啟一次，每輪以rewind()從頭開始
+        self._file: Optional[BinaryIO] = None
+        self._records: Optional[Iterator[Tuple[bytes, int]]] = None
+        # 開啟時檔案的 (st_ino, st_size, st_mtime_ns)，用來偵測檔案被改寫
+        self._file_stat: Optional[Tuple[int, int, int]] = None
+        
+    def __iter__(self) -> Iterator[Tuple[bytes, int]]:
+        """
+        走訪目前這一輪的 (hex_bytes, delay_ms)；第一次走訪時開啟檔案，之後重複使用。
+        同一輪中再次走訪會從上次停下的位置繼續，呼叫rewind()後才回到開頭
+        """
+        if self._records is None:
+            self._records = self._iter_persistent_records()
+        return self._records
+    
+    def rewind(self) -> bool:
+        """
+        回到檔案開頭，下一次走訪重新從第一筆資料開始。
+        檔案未變更時重複使用已開啟的檔案；若檔案在開啟後被改寫、截斷或取代，
+        關閉舊的檔案，下一次走訪重新開啟，讀到的才是新的內容
+        
+        Returns:
+            bool: 檔案自上次開啟後有變更返回True，呼叫端應重新計算資料筆數
+        """
+        self._records = None
+        if self._file is None:
+            return False
+        
+        try:
+            stat = os.stat(self.filename)
+            current = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            current = None
+        if current == self._file_stat:
+            return False
+        
+        self.close()
+        return True
+    
+    def close(self):
+        """
+        釋放持續開啟的檔案
+        """
+        self._records = None
+        if self._file is not None:
+            self._fadvise(self._file.fileno(), 'POSIX_FADV_DONTNEED')
+            self._file.close()
+            self._file = None
+        self._file_stat = None
         
     def parse_file(self) -> List[Tuple[bytes, int]]:
         """
@@ -20,61 +99,335 @@ class HexParser:
         Returns:
             List[Tuple[bytes, int]]: [(hex_bytes, delay_ms), ...]
         """
-        self.hex_data = []
-        for hex_bytes, delay_ms in self.parse_file_generator():
-            self.hex_data.append((hex_bytes, delay_ms))
+        self.hex_data = list(self._iter_file_records(use_mmap=True))
         return self.hex_data
     
-    def parse_file_generator(self):
+    def parse_file_packed(self) -> Tuple[bytearray, array]:
+        """
+        解析HEX檔案並以緊湊格式儲存：所有資料連續放在同一個bytearray，
+        另以array('I')記錄每筆的 (offset, length, delay_ms)，避免每筆資料各自配置物件
+        
+        Returns:
+            Tuple[bytearray, array]: (packet_buffer, packet_index)
+        """
+        buffer = bytearray()
+        index = array('I')
+        
+        for hex_bytes, delay_ms in self._iter_file_records(use_mmap=True):
+            index.extend((len(buffer), len(hex_bytes), delay_ms))
+            buffer += hex_bytes
+        
+        self.packet_buffer = buffer
+        self.packet_index = index
+        return buffer, index
+    
+    def get_packet(self, i: int) -> Tuple[memoryview, int]:
+        """
+        從緊湊格式取得第i筆資料，不複製資料內容
+        
+        Args:
+            i: 資料索引 (0-based)
+            
+        Returns:
+            Tuple[memoryview, int]: (資料的memoryview, delay_ms)
+        """
+        offset, length, delay_ms = self.packet_index[i * 3:i * 3 + 3]
+        return memoryview(self.packet_buffer)[offset:offset + length], delay_ms
+    
+    def iter_packets(self) -> Iterator[Tuple[memoryview, int]]:
+        """
+        依序走訪緊湊格式中的每筆資料，不複製資料內容
+        
+        Yields:
+            Tuple[memoryview, int]: (資料的memoryview, delay_ms)
+        """
+        view = memoryview(self.packet_buffer)
+        index = self.packet_index
+        for i in range(0, len(index), 3):
+            offset = index[i]
+            yield view[offset:offset + index[i + 1]], index[i + 2]
+    
+    def get_packet_count(self) -> int:
+        """
+        獲取緊湊格式中的資料筆數
+        
+        Returns:
+            int: 資料筆數
+        """
+        return len(self.packet_index) // 3
+    
+    def count_records(self) -> int:
+        """
+        計算檔案中的資料筆數。結果快取在 <檔名>.meta.json，
+        檔案的修改時間與大小未變時直接讀取快取，不必重新掃描整個檔案
+        
+        Returns:
+            int: 資料筆數
+        """
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"找不到檔案: {self.filename}")
+        meta_filename = self.filename + self.META_SUFFIX
+        
+        try:
+            with open(meta_filename, 'r', encoding='utf-8') as meta_file:
+                meta = json.load(meta_file)
+            if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+                return int(meta['count'])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            # 快取不存在或內容損壞，重新計算
+            pass
+        
+        count = sum(1 for _ in self._iter_file_records(use_mmap=True))
+        
+        try:
+            with open(meta_filename, 'w', encoding='utf-8') as meta_file:
+                json.dump({'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'count': count}, meta_file)
+        except OSError:
+            # 唯讀目錄等無法寫入快取的情況，下次載入時重新計算即可
+            pass
+        
+        return count
+    
+    def parse_file_generator(self) -> Iterator[Tuple[bytes, int]]:
+        """
+        記憶體效率版本：以二進位模式分塊讀取，使用generator避免載入整個檔案
+        
+        Yields:
+            Tuple[bytes, int]: (hex_bytes, delay_ms)
+        """
+        # 走訪速度由呼叫端決定，可能持續很久，只用read()；
+        # 期間檔案被截斷時mmap會讓整個行程因SIGBUS結束
+        yield from self._iter_file_records(use_mmap=False)
+    
+    def _iter_file_records(self, use_mmap: bool) -> Iterator[Tuple[bytes, int]]:
+        """
+        開啟檔案並逐筆解析
+        
+        Args:
+            use_mmap: True以mmap掃描，只適合一次讀完整個檔案的短時間走訪
+            
+        Yields:
+            Tuple[bytes, int]: (hex_bytes, delay_ms)
+        """
+        try:
+            with open(self.filename, 'rb', buffering=self.READ_CHUNK_SIZE) as file:
+                yield from self._iter_records(self._iter_line_chunks(file, use_mmap))
+        except FileNotFoundError:
+            raise FileNotFoundError(f"找不到檔案: {self.filename}")
+        except Exception as e:
+            raise Exception(f"解析檔案時發生錯誤: {str(e)}")
+    
+    def _iter_persistent_records(self) -> Iterator[Tuple[bytes, int]]:
         """
-        記憶體效率版本：逐行讀取，使用generator避免載入整個檔案
+        可重複走訪版本：從持續開啟的檔案解析一輪資料
         
         Yields:
             Tuple[bytes, int]: (hex_bytes, delay_ms)
         """
         try:
-            with open(self.filename, 'r', encoding='utf-8') as file:
-                current_hex_block = ""
-                
-                for line in file:
-                    line = line.strip()
-                    
-                    # 遇到空行，處理當前累積的資料塊
-                    if not line:
-                        if current_hex_block:
-                            hex_bytes = self._parse_hex_line(current_hex_block)
-                            if hex_bytes:
-                                delay_ms = self._get_delay_time(hex_bytes)
-                                yield (hex_bytes, delay_ms)
-                            current_hex_block = ""
-                    else:
-                        # 非空行，累積到當前資料塊
-                        current_hex_block += " " + line if current_hex_block else line
-                
-                # 處理最後一個資料塊（如果檔案結尾沒有空行）
-                if current_hex_block:
-                    hex_bytes = self._parse_hex_line(current_hex_block)
-                    if hex_bytes:
-                        delay_ms = self._get_delay_time(hex_bytes)
-                        yield (hex_bytes, delay_ms)
-                        
+            yield from self._iter_records(self._iter_persistent_chunks())
         except FileNotFoundError:
             raise FileNotFoundError(f"找不到檔案: {self.filename}")
         except Exception as e:
             raise Exception(f"解析檔案時發生錯誤: {str(e)}")
     
-    def _parse_hex_line(self, line: str) -> bytes:
+    def _iter_records(self, chunks: Iterator[List[bytes]]) -> Iterator[Tuple[bytes, int]]:
+        """
+        將分塊的行資料組合成資料塊並解析：空白行作為分隔，非空行連續合併
+        
+        Args:
+            chunks: 每次產出一個區塊內的行資料
+            
+        Yields:
+            Tuple[bytes, int]: (hex_bytes, delay_ms)
+        """
+        # 所有已知標頭的第一個byte，開頭不符的資料必定使用預設延遲，不需查表
+        header_first_bytes = {header[0] for header in self.DELAY_TABLE}
+        default_delay_ms = self.DEFAULT_DELAY_MS
+        
+        current_hex_block: List[bytes] = []
+        
+        for lines in chunks:
+            for line in lines:
+                line = line.strip(_ASCII_WHITESPACE)
+                
+                # 遇到空行，處理當前累積的資料塊；含非ASCII字元時依UTF-8文字判斷，
+                # 只有全形空白、NBSP等Unicode空白的行同樣視為空行
+                if not line or (not line.isascii() and not line.decode('utf-8', 'replace').strip()):
+                    if current_hex_block:
+                        hex_bytes = self._parse_hex_line(b" ".join(current_hex_block))
+                        if hex_bytes:
+                            if hex_bytes[0] in header_first_bytes:
+                                delay_ms = self._get_delay_time(hex_bytes)
+                            else:
+                                delay_ms = default_delay_ms
+                            yield (hex_bytes, delay_ms)
+                        current_hex_block.clear()
+                else:
+                    # 非空行，累積到當前資料塊，遇到分隔時才一次合併
+                    current_hex_block.append(line)
+        
+        # 處理最後一個資料塊（如果檔案結尾沒有空行）
+        if current_hex_block:
+            hex_bytes = self._parse_hex_line(b" ".join(current_hex_block))
+            if hex_bytes:
+                if hex_bytes[0] in header_first_bytes:
+                    delay_ms = self._get_delay_time(hex_bytes)
+                else:
+                    delay_ms = default_delay_ms
+                yield (hex_bytes, delay_ms)
+    
+    def _iter_persistent_chunks(self) -> Iterator[List[bytes]]:
+        """
+        從持續開啟的檔案切割行資料，供可重複走訪的解析使用；
+        第一次呼叫時開啟檔案，之後每輪seek(0)重複使用同一個檔案。
+        整個發送期間都在讀取，因此不使用mmap：檔案被截斷時mmap會讓行程因SIGBUS結束
+        
+        Yields:
+            List[bytes]: 一個區塊內不含換行字元的原始行資料
+        """
+        if self._file is None:
+            self._file = open(self.filename, 'rb', buffering=self.READ_CHUNK_SIZE)
+            stat = os.fstat(self._file.fileno())
+            self._file_stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            self._fadvise(self._file.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        
+        self._file.seek(0)
+        yield from self._iter_read_chunks(self._file)
+    
+    def _iter_line_chunks(self, file: BinaryIO, use_mmap: bool) -> Iterator[List[bytes]]:
+        """
+        將二進位檔案切割成行。use_mmap時以mmap直接掃描分頁快取中的檔案內容，
+        無法映射時（空檔案、管線等非一般檔案）及長時間的串流走訪改用分塊read()
+        
+        Args:
+            file: 以二進位模式開啟的檔案物件
+            use_mmap: 是否嘗試以mmap掃描
+            
+        Yields:
+            List[bytes]: 一個區塊內不含換行字元的原始行資料
+        """
+        fd = file.fileno()
+        
+        # 告知核心為循序讀取，加大預讀；讀完後釋放分頁快取，減少SD卡環境的記憶體壓力
+        self._fadvise(fd, 'POSIX_FADV_SEQUENTIAL')
+        try:
+            if not use_mmap:
+                yield from self._iter_read_chunks(file)
+                return
+            try:
+                mapped = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                yield from self._iter_read_chunks(file)
+                return
+            
+            try:
+                if hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
+                yield from self._iter_mmap_chunks(mapped)
+            finally:
+                mapped.close()
+        finally:
+            self._fadvise(fd, 'POSIX_FADV_DONTNEED')
+    
+    @staticmethod
+    def _fadvise(fd: int, advice_name: str):
+        """
+        呼叫posix_fadvise提示核心檔案存取模式，不支援的平台或檔案類型直接略過
+        
+        Args:
+            fd: 檔案描述符
+            advice_name: os模組中的提示常數名稱，如 'POSIX_FADV_SEQUENTIAL'
+        """
+        advice = getattr(os, advice_name, None)
+        if advice is None or not hasattr(os, 'posix_fadvise'):
+            return
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            # 管線等不支援fadvise的檔案類型
+            pass
+    
+    def _iter_mmap_chunks(self, mapped: mmap.mmap) -> Iterator[List[bytes]]:
+        """
+        以約READ_CHUNK_SIZE大小、對齊行邊界的區塊掃描mmap內容
+        
+        Args:
+            mapped: 唯讀的mmap物件
+            
+        Yields:
+            List[bytes]: 一個區塊內不含換行字元的原始行資料
+        """
+        size = len(mapped)
+        pos = 0
+        while pos < size:
+            window_end = pos + self.READ_CHUNK_SIZE
+            if window_end >= size:
+                yield mapped[pos:size].splitlines()
+                break
+            
+            # 在區塊內找最後一個換行（\n或\r），找不到（超長行）則往後找下一個換行
+            end = max(mapped.rfind(b"\n", pos, window_end), mapped.rfind(b"\r", pos, window_end))
+            if end < 0:
+                ends = [i for i in (mapped.find(b"\n", window_end), mapped.find(b"\r", window_end)) if i >= 0]
+                if not ends:
+                    yield mapped[pos:size].splitlines()
+                    break
+                end = min(ends)
+            # \r\n不可從中間切開，否則會多出一個空行
+            if mapped[end] == 0x0D and end + 1 < size and mapped[end + 1] == 0x0A:
+                end += 1
+            yield mapped[pos:end + 1].splitlines()
+            pos = end + 1
+    
+    def _iter_read_chunks(self, file: BinaryIO) -> Iterator[List[bytes]]:
+        """
+        以固定大小的區塊讀取二進位檔案，每個區塊一次切割成多行；
+        換行規則與文字模式的universal newlines相同（\n、\r、\r\n）
+        
+        Args:
+            file: 以二進位模式開啟的檔案物件
+            
+        Yields:
+            List[bytes]: 一個區塊內不含換行字元的原始行資料
+        """
+        tail = b""
+        while True:
+            chunk = file.read(self.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            data = tail + chunk
+            # 結尾的\r可能與下一個區塊開頭的\n組成\r\n，先保留
+            limit = len(data) - 1 if data.endswith(b"\r") else len(data)
+            end = max(data.rfind(b"\n", 0, limit), data.rfind(b"\r", 0, limit))
+            # 最後一段可能是不完整的行，保留到下一個區塊
+            tail = data[end + 1:]
+            if end >= 0:
+                yield data[:end + 1].splitlines()
+        if tail:
+            yield tail.splitlines()
+    
+    def _parse_hex_line(self, line: bytes) -> Optional[bytes]:
         """
         將HEX字串行轉換為bytes
         
         Args:
-            line: HEX字串行，如 "60 01 13 20 01 01 00 00 1C"
+            line: 檔案中的原始HEX字串行，如 b"60 01 13 20 01 01 00 00 1C"
             
         Returns:
-            bytes: 轉換後的bytes資料
+            Optional[bytes]: 轉換後的bytes資料，格式錯誤時返回None
         """
+        # 快速路徑：標準格式（空白分隔的兩字元HEX）直接交給C層級的bytes.fromhex，
+        # 它本身會略過ASCII空白字符，不需先清除；非ASCII內容的解碼錯誤同為ValueError
+        try:
+            return bytes.fromhex(line.decode('ascii'))
+        except ValueError:
+            pass
+
         # 移除所有非十六進制字符，保留0-9, A-F, a-f
-        hex_string = re.sub(r'[^0-9A-Fa-f]', '', line)
+        hex_string = line.translate(None, _DELETE_BYTES)
         
         # 確保字串長度為偶數
         if len(hex_string) % 2 != 0:
@@ -82,7 +435,7 @@ class HexParser:
             
         try:
             # 每兩個字符轉換為一個byte
-            hex_bytes = bytes.fromhex(hex_string)
+            hex_bytes = bytes.fromhex(hex_string.decode('ascii'))
             return hex_bytes
         except ValueError:
             return None
@@ -97,18 +450,9 @@ class HexParser:
         Returns:
             int: 延遲毫秒數
         """
-        if len(hex_bytes) < 4:
-            return 10  # 預設延遲
-            
-        # 檢查前四個bytes
-        header = hex_bytes[:4]
-        
-        if header == b'\x60\x01\x13\x20':  # "60 01 13 20"
-            return 1000
-        elif header == b'\x60\x01\x13\x30':  # "60 01 13 30"
-            return 10
-        else:
-            return 10  # 預設延遲
+        # 以前四個bytes查表，一次雜湊查詢取代逐一比較；
+        # 不足四個bytes的資料切片後長度不符，自然落到預設延遲
+        return self.DELAY_TABLE.get(hex_bytes[:4], self.DEFAULT_DELAY_MS)
     
     def get_hex_string(self, hex_bytes: bytes) -> str:
         """
@@ -120,7 +464,8 @@ class HexParser:
         Returns:
             str: 格式化的HEX字串，如 "60 01 13 20 01 01"
         """
-        return ' '.join(f'{b:02X}' for b in hex_bytes)
+        # bytes.hex的分隔字元參數由C實作，比逐byte格式化快數十倍
+        return hex_bytes.hex(' ').upper()
     
     def get_total_count(self) -> int:
         """
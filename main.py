@@ -12,15 +12,22 @@ RS485 HEX資料傳送器
 
 import sys
 import argparse
+import logging
 import signal
 import os
+import queue
+import threading
 from hex_parser import HexParser
 from rs485_comm import RS485Communicator
+import sender_controller
 from sender_controller import SenderController
 from progress_display import ProgressDisplay
 
 
 class RS485HexSender:
+    # 顯示事件佇列上限，顯示跟不上時讓發送端等待，避免記憶體無限成長
+    UI_QUEUE_SIZE = 1024
+    
     def __init__(self):
         """
         初始化RS485 HEX傳送器
@@ -30,6 +37,12 @@ class RS485HexSender:
         self.progress_display = ProgressDisplay()
         self.is_running = False
         
+        # 發送結束時由發送控制器設定，主執行緒以此等待而非輪詢
+        self._done_event = threading.Event()
+        
+        # 發送執行緒產生的顯示事件，由主執行緒取出並更新畫面
+        self._ui_queue = queue.Queue(maxsize=self.UI_QUEUE_SIZE)
+        
     def setup_signal_handlers(self):
         """
         設定訊號處理器，處理Ctrl+C中斷
@@ -70,6 +83,10 @@ class RS485HexSender:
     
 記憶體模式:
     --memory-efficient: 適合大型檔案，節省記憶體使用
+    資料筆數快取於資料檔旁的 <檔名>.meta.json（--test 時亦同），可隨時刪除
+    
+除錯:
+    --verbose: 輸出每筆資料的延遲與傳送耗時記錄
             """
         )
         
@@ -109,6 +126,12 @@ class RS485HexSender:
             help='記憶體效率模式，適合處理大型檔案'
         )
         
+        parser.add_argument(
+            '--verbose', '-v',
+            action='store_true',
+            help='輸出時間控制除錯記錄'
+        )
+        
         return parser.parse_args()
     
     def validate_hex_file(self, filename: str) -> bool:
@@ -187,19 +210,63 @@ class RS485HexSender:
         """
         # 進度更新回調
         self.sender_controller.set_progress_callback(
-            self.progress_display.update_progress
+            self._on_main_thread(self.progress_display.update_progress)
         )
         
         # 資料發送回調
         self.sender_controller.set_data_sent_callback(
-            self.progress_display.show_data_sent
+            self._on_main_thread(self.progress_display.show_data_sent)
         )
         
         # 循環完成回調
         self.sender_controller.set_cycle_complete_callback(
-            self.progress_display.show_cycle_complete
+            self._on_main_thread(self.progress_display.show_cycle_complete)
+        )
+        
+        # 發送結束回調
+        self.sender_controller.set_send_complete_callback(
+            self._on_send_complete
         )
     
+    def _on_main_thread(self, func):
+        """
+        包裝顯示回調：發送端的回調一律放入佇列交給主執行緒處理，
+        讓畫面輸出不佔用發送執行緒的時間
+        
+        Args:
+            func: 要在主執行緒執行的顯示函數
+            
+        Returns:
+            Callable: 包裝後的回調函數
+        """
+        def dispatch(*args):
+            self._ui_queue.put((func, args))
+        return dispatch
+    
+    def _on_send_complete(self):
+        """
+        發送結束回調，設定完成事件並喚醒等待中的主執行緒
+        """
+        self._done_event.set()
+        self._ui_queue.put(None)
+    
+    def _process_ui_events(self, timeout: float):
+        """
+        等待並處理發送執行緒送來的顯示事件
+        
+        Args:
+            timeout: 等待第一個事件的最長秒數，0表示只處理已在佇列中的事件
+        """
+        try:
+            event = self._ui_queue.get(timeout=timeout) if timeout > 0 else self._ui_queue.get_nowait()
+            while True:
+                if event is not None:
+                    func, args = event
+                    func(*args)
+                event = self._ui_queue.get_nowait()
+        except queue.Empty:
+            pass
+    
     def start_sending(self, hex_file: str, continuous: bool = True, memory_efficient: bool = False):
         """
         開始發送HEX資料
@@ -233,21 +300,25 @@ class RS485HexSender:
             
             # 開始發送
             self.is_running = True
-            self.sender_controller.start_sending(continuous)
+            self._done_event.clear()
+            if self.sender_controller.start_sending(continuous) is None:
+                return False
             
             if continuous:
-                # 循環模式，等待用戶中斷
+                # 循環模式，處理顯示事件直到發送結束或用戶中斷
                 try:
-                    while self.is_running and self.sender_controller.is_running:
-                        import time
-                        time.sleep(0.1)
+                    while (self.is_running and self.sender_controller.is_running
+                           and not self._done_event.is_set()):
+                        self._process_ui_events(timeout=1.0)
                 except KeyboardInterrupt:
                     pass
             else:
-                # 單次模式，等待完成
-                import time
-                while self.sender_controller.is_running:
-                    time.sleep(0.1)
+                # 單次模式，同樣在背景執行緒發送，處理顯示事件直到完成
+                while self.sender_controller.is_running and not self._done_event.is_set():
+                    self._process_ui_events(timeout=1.0)
+            
+            # 顯示剩餘的事件
+            self._process_ui_events(timeout=0)
             
             return True
             
@@ -280,6 +351,11 @@ class RS485HexSender:
         # 解析命令列參數
         args = self.parse_arguments()
         
+        # 時間控制記錄預設關閉，發送迴圈不必為記錄取時間戳
+        if args.verbose:
+            logging.basicConfig(level=logging.DEBUG, format='%(message)s', stream=sys.stdout)
+            sender_controller.DEBUG_TIMING = True
+        
         try:
             # 驗證HEX檔案
             if not self.validate_hex_file(args.hex_file):
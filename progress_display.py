@@ -44,7 +44,9 @@ class ProgressDisplay:
             hex_string: 當前傳送的HEX字串
         """
         current_time = time.time()
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]  # 精確到毫秒
+        # 精確到毫秒，直接由time.time()計算，避免建立datetime物件
+        ms = int((current_time - int(current_time)) * 1000)
+        timestamp = time.strftime("%H:%M:%S", time.localtime(current_time)) + f".{ms:03d}"
         
         # 計算進度百分比
         progress_percent = (current_index / total_count) * 100
@@ -52,22 +54,23 @@ class ProgressDisplay:
         # 計算已運行時間
         elapsed_time = current_time - self.start_time if self.start_time else 0
         
-        # 更新總發送數
-        self.total_sent += 1
+        # 進度回調在傳送前觸發，total_sent只累計已完成的發送回調，顯示時加上目前這一筆
+        sent_count = self.total_sent + 1
         
         # 計算發送速率（每秒）
-        send_rate = self.total_sent / elapsed_time if elapsed_time > 0 else 0
-        
-        # 清除當前行並更新顯示
-        print(f"\r時間: {timestamp} | "
-              f"循環: {cycle_count} | "
-              f"進度: {current_index}/{total_count} ({progress_percent:.1f}%) | "
-              f"總發送: {self.total_sent} | "
-              f"速率: {send_rate:.1f}/s", 
-              end="", flush=True)
-        
-        # 每行顯示發送的HEX資料
-        print(f"\n發送: {hex_string}")
+        send_rate = sent_count / elapsed_time if elapsed_time > 0 else 0
+        
+        # 清除當前行並更新顯示，每行顯示發送的HEX資料；
+        # 發送端已將進度回調限制在約10Hz，每次直接以一次write輸出，不再另外緩衝
+        sys.stdout.write(
+            f"\r時間: {timestamp} | "
+            f"循環: {cycle_count} | "
+            f"進度: {current_index}/{total_count} ({progress_percent:.1f}%) | "
+            f"總發送: {sent_count} | "
+            f"速率: {send_rate:.1f}/s"
+            f"\n發送: {hex_string}\n"
+        )
+        sys.stdout.flush()
         
         self.last_update_time = current_time
     
@@ -79,6 +82,9 @@ class ProgressDisplay:
             hex_string: 發送的HEX字串
             success: 發送是否成功
         """
+        # 進度回調有節流，總發送數改由每筆都會觸發的發送回調累計
+        self.total_sent += 1
+        
         status = "✓" if success else "✗"
         status_text = "成功" if success else "失敗"
         
@@ -192,4 +198,4 @@ class ProgressDisplay:
         Returns:
             str: 格式化的HEX字串
         """
-        return ' '.join(f'{b:02X}' for b in hex_bytes)
\ No newline at end of file
+        return hex_bytes.hex(' ').upper()
\ No newline at end of file
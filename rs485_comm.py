@@ -5,7 +5,11 @@ RS485通訊模組
 
 import serial
 import time
-from typing import Optional
+from typing import Iterable, List, Optional, Union
+
+
+# serial.write可直接接受任何支援buffer protocol的物件
+BufferLike = Union[bytes, bytearray, memoryview]
 
 
 class RS485Communicator:
@@ -31,7 +35,7 @@ class RS485Communicator:
         if config:
             self.config.update(config)
             
-        self.serial_port = None
+        self.serial_port: Optional[serial.Serial] = None
         self.is_connected = False
     
     def connect(self) -> bool:
@@ -55,6 +59,10 @@ class RS485Communicator:
             # 等待連接穩定
             time.sleep(0.1)
             
+            # 連接時清除一次緩衝區，之後的發送不再逐筆清除
+            self.serial_port.reset_input_buffer()
+            self.serial_port.reset_output_buffer()
+            
             self.is_connected = True
             return True
             
@@ -78,12 +86,27 @@ class RS485Communicator:
             except Exception as e:
                 print(f"中斷連接時發生錯誤: {str(e)}")
     
-    def send_data(self, data: bytes) -> bool:
+    def reset_buffers(self):
+        """
+        清除串列埠的輸入與輸出緩衝區
+        發送失敗（如部分寫入後超時）時由發送控制器呼叫，避免殘留資料混入下一筆
+        """
+        if not self.serial_port:
+            return
+            
+        try:
+            self.serial_port.reset_input_buffer()
+            self.serial_port.reset_output_buffer()
+        except Exception as e:
+            print(f"清除緩衝區時發生錯誤: {str(e)}")
+    
+    def send_data(self, data: BufferLike, flush: bool = False) -> bool:
         """
         發送資料到RS485
         
         Args:
-            data: 要發送的bytes資料
+            data: 要發送的資料，bytes/bytearray/memoryview皆可，不需先轉成bytes
+            flush: True則等待資料實際傳送完畢才返回（同步傳送）
             
         Returns:
             bool: 發送成功返回True，失敗返回False
@@ -96,17 +119,12 @@ class RS485Communicator:
             return True
             
         try:
-            # 清除緩衝區
-            if self.serial_port.in_waiting:
-                self.serial_port.reset_input_buffer()
-            if self.serial_port.out_waiting:
-                self.serial_port.reset_output_buffer()
-            
             # 發送資料
             bytes_written = self.serial_port.write(data)
             
-            # 確保資料被發送出去
-            self.serial_port.flush()
+            # 呼叫端要求同步傳送時，等待資料被發送出去
+            if flush:
+                self.serial_port.flush()
             
             return bytes_written == len(data)
             
@@ -120,6 +138,97 @@ class RS485Communicator:
             print(f"發送資料時發生未預期錯誤: {str(e)}")
             return False
     
+    def send_data_batch(self, datas: List[BufferLike]) -> bool:
+        """
+        將多筆資料合併後一次發送到RS485，只觸發一次write與flush
+        資料之間不會有間隔，僅適用於協定允許連續傳送的資料
+        
+        Args:
+            datas: 要發送的資料列表，bytes/bytearray/memoryview皆可
+            
+        Returns:
+            bool: 全部發送成功返回True，失敗返回False
+        """
+        if not self.is_connected:
+            return False
+            
+        # 測試模式：沒有實際serial_port但is_connected為True
+        if not self.serial_port:
+            return True
+            
+        try:
+            buffer = b''.join(datas)
+            
+            # 發送資料
+            bytes_written = self.serial_port.write(buffer)
+            
+            # 確保資料被發送出去
+            self.serial_port.flush()
+            
+            return bytes_written == len(buffer)
+            
+        except serial.SerialTimeoutException:
+            print("批次發送資料時超時")
+            return False
+        except serial.SerialException as e:
+            print(f"批次發送資料時發生串列埠錯誤: {str(e)}")
+            return False
+        except Exception as e:
+            print(f"批次發送資料時發生未預期錯誤: {str(e)}")
+            return False
+    
+    def send_many(self, datas: Iterable[BufferLike], min_gap_ms: float = 0) -> bool:
+        """
+        依序發送多筆資料，每筆傳送完畢後至少間隔min_gap_ms毫秒才發送下一筆
+        min_gap_ms為0時等同send_data_batch，合併為一次write與flush
+        
+        Args:
+            datas: 要發送的資料，bytes/bytearray/memoryview皆可
+            min_gap_ms: 兩筆資料之間的最小間隔(毫秒)
+            
+        Returns:
+            bool: 全部發送成功返回True，任一筆失敗即停止並返回False
+        """
+        if min_gap_ms <= 0:
+            return self.send_data_batch(list(datas))
+        
+        if not self.is_connected:
+            return False
+            
+        # 測試模式：沒有實際serial_port但is_connected為True
+        if not self.serial_port:
+            return True
+        
+        gap = min_gap_ms / 1000.0
+        write = self.serial_port.write
+        flush = self.serial_port.flush
+        last_end = None
+        
+        try:
+            for data in datas:
+                # 間隔以上一筆實際傳送完成的時間起算
+                if last_end is not None:
+                    remaining = last_end + gap - time.perf_counter()
+                    if remaining > 0:
+                        time.sleep(remaining)
+                
+                if write(data) != len(data):
+                    return False
+                flush()
+                last_end = time.perf_counter()
+            
+            return True
+            
+        except serial.SerialTimeoutException:
+            print("批次發送資料時超時")
+            return False
+        except serial.SerialException as e:
+            print(f"批次發送資料時發生串列埠錯誤: {str(e)}")
+            return False
+        except Exception as e:
+            print(f"批次發送資料時發生未預期錯誤: {str(e)}")
+            return False
+    
     def get_port_info(self) -> dict:
         """
         獲取目前RS485連接資訊
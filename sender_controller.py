@@ -3,14 +3,50 @@
 負責管理循環發送邏輯和時間控制
 """
 
+import logging
 import time
+import queue
 import threading
-from typing import List, Tuple, Callable
+from array import array
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Tuple, Union
 from hex_parser import HexParser
-from rs485_comm import RS485Communicator
+from rs485_comm import BufferLike, RS485Communicator
+
+
+# 數據包類型：依開頭四個bytes分類，需要間隔控制的類型同時作為 _last_send_times 的索引
+PACKET_TAG_60_01_13_20 = 0
+PACKET_TAG_60_01_13_30 = 1
+PACKET_TAG_OTHER = 2
+
+_PACKET_TAGS = {
+    b'\x60\x01\x13\x20': PACKET_TAG_60_01_13_20,  # "60 01 13 20"
+    b'\x60\x01\x13\x30': PACKET_TAG_60_01_13_30,  # "60 01 13 30"
+}
+_PACKET_TAG_ITEMS = tuple(_PACKET_TAGS.items())
+_PACKET_LABELS = ('60 01 13 20', '60 01 13 30')
+
+logger = logging.getLogger(__name__)
+
+# 時間控制記錄開關：關閉時發送迴圈完全不取時間戳或記錄，由main的 --verbose 開啟
+DEBUG_TIMING = False
 
 
 class SenderController:
+    # 時間控制記錄佇列上限（超過時捨棄最舊的記錄）與背景輸出間隔(秒)
+    LOG_QUEUE_SIZE = 4096
+    LOG_FLUSH_INTERVAL = 0.05
+    
+    # 延遲的最後一段改用忙等，避開time.sleep約1ms的喚醒誤差(秒)
+    SPIN_THRESHOLD = 0.002
+    SPIN_MARGIN = 0.001
+    
+    # 記憶體效率模式：解析執行緒與發送迴圈之間的佇列上限，提供背壓讓記憶體用量維持固定
+    PRODUCER_QUEUE_SIZE = 64
+    
+    # 進度回調的最短間隔(秒)，每輪最後一筆一定回調，讓顯示停在100%
+    PROGRESS_CALLBACK_INTERVAL = 0.1
+    
     def __init__(self, rs485_comm: RS485Communicator):
         """
         初始化發送控制器
@@ -19,25 +55,68 @@ class SenderController:
             rs485_comm: RS485通訊器實例
         """
         self.rs485_comm = rs485_comm
-        self.hex_data = []
+        
+        # 傳統模式的資料以欄位分開存放：所有資料連續放在 _blob，
+        # _index 為 HexParser.parse_file_packed 的 (offset, length, delay_ms) 三元組，
+        # 另存每筆的數據包類型與預先格式化的HEX字串
+        self._blob = bytearray()
+        self._index = array('I')
+        self._tags = array('b')
+        self._hex_strings: List[str] = []
+        
+        # 記憶體效率模式持續使用的解析器，每輪rewind()後重新走訪，不重新開啟檔案
+        self._parser: Optional[HexParser] = None
+        
+        # 每輪實際使用的發送實作，載入檔案時依模式與內容選擇
+        self._send_cycle_impl: Callable[[], None] = self._send_one_cycle_traditional
         self.hex_filename = ""
         self.use_memory_efficient = False
         self.current_index = 0
         self.cycle_count = 0
-        self.is_running = False
-        self.is_paused = False
         self.total_sent = 0
         self.total_data_count = 0
         
-        # 時間間隔控制
-        self.last_60_01_13_20_time = 0
-        self.last_60_01_13_30_time = 0
+        # 執行狀態以Event表示：_stop_evt設定代表已停止，_pause_evt設定代表未暫停；
+        # 暫停時發送執行緒阻塞在wait()上，不必輪詢，恢復或停止時立即喚醒
+        self._stop_evt = threading.Event()
+        self._stop_evt.set()
+        self._pause_evt = threading.Event()
+        self._pause_evt.set()
+        
+        # 時間控制記錄：發送迴圈只把原始數值放入佇列，由背景執行緒格式化並輸出
+        self._log_q: Deque[Tuple[float, str, Tuple[Any, ...]]] = deque(maxlen=self.LOG_QUEUE_SIZE)
+        self._log_lock = threading.Lock()
+        self._log_thread: Optional[threading.Thread] = None
+        self.send_thread: Optional[threading.Thread] = None
+        
+        # 記錄時間戳的秒數部分快取 (整數秒, "HH:MM:SS")，同一秒內的記錄不必重複呼叫strftime
+        self._sec_cache = (0, '')
+        
+        # 目前發送中的HEX字串，由發送迴圈更新，兩種模式共用
+        self._current_hex_string = ""
+        
+        # 時間間隔控制：各數據包類型的上次傳送完成時間（time.perf_counter()），以類型為索引
+        self._last_send_times = [0.0, 0.0]
+        
+        # 上次進度回調的時間（time.perf_counter()）
+        self._last_progress_cb_time = 0.0
         
         # 回調函數
-        self.on_progress_callback = None
-        self.on_data_sent_callback = None
-        self.on_cycle_complete_callback = None
+        self.on_progress_callback: Optional[Callable] = None
+        self.on_data_sent_callback: Optional[Callable] = None
+        self.on_cycle_complete_callback: Optional[Callable] = None
+        self.on_send_complete_callback: Optional[Callable] = None
         
+    @property
+    def is_running(self) -> bool:
+        """是否正在發送"""
+        return not self._stop_evt.is_set()
+    
+    @property
+    def is_paused(self) -> bool:
+        """是否暫停中"""
+        return not self._pause_evt.is_set()
+    
     def load_hex_file(self, filename: str, memory_efficient: bool = False) -> bool:
         """
         載入HEX檔案
@@ -50,37 +129,55 @@ class SenderController:
             bool: 載入成功返回True，失敗返回False
         """
         try:
+            self._close_parser()
             parser = HexParser(filename)
             self.hex_filename = filename
             self.use_memory_efficient = memory_efficient
             self.current_index = 0
             self.cycle_count = 0
             self.total_sent = 0
+            self._current_hex_string = ""
             
             if memory_efficient:
                 # 記憶體效率模式：只計算總數，不載入全部資料
-                self.hex_data = []
-                self.total_data_count = 0
+                self._clear_packed_data()
                 
-                # 計算總資料筆數
-                for _ in parser.parse_file_generator():
-                    self.total_data_count += 1
+                # 計算總資料筆數（檔案未變更時由快取檔取得，不重新掃描）
+                self.total_data_count = parser.count_records()
                 
                 if self.total_data_count == 0:
                     print("警告: 檔案中沒有有效的HEX資料")
                     return False
-                    
+                
+                self._parser = parser
+                self._send_cycle_impl = self._send_one_cycle_memory_efficient
                 print(f"成功載入 {self.total_data_count} 筆HEX資料 (記憶體效率模式)")
             else:
-                # 傳統模式：全部載入記憶體
-                self.hex_data = parser.parse_file()
-                self.total_data_count = len(self.hex_data)
+                # 傳統模式：全部載入記憶體，資料連續存放不各自配置bytes物件，
+                # 並預先格式化好每筆的HEX字串與數據包類型，發送時不必重複轉換與比對標頭
+                self._blob, self._index = parser.parse_file_packed()
+                self._tags = array('b')
+                self._hex_strings = []
+                blob = self._blob
+                index = self._index
+                for i, (packet, _) in enumerate(parser.iter_packets()):
+                    # 直接在連續緩衝上比對標頭，不必切出每筆資料
+                    offset = index[i * 3]
+                    self._tags.append(self._classify_packet(blob, offset, offset + index[i * 3 + 1]))
+                    self._hex_strings.append(packet.hex(' ').upper())
+                self.total_data_count = parser.get_packet_count()
                 
-                if not self.hex_data:
+                if self.total_data_count == 0:
                     print("警告: 檔案中沒有有效的HEX資料")
                     return False
+                
+                # 只有單一數據包類型且延遲相同的檔案（固定節奏），改用不需逐筆分派的特化迴圈
+                if len(set(self._tags)) == 1 and len(set(index[2::3])) == 1:
+                    self._send_cycle_impl = self._send_cycle_constant_cadence
+                else:
+                    self._send_cycle_impl = self._send_one_cycle_traditional
                     
-                print(f"成功載入 {len(self.hex_data)} 筆HEX資料")
+                print(f"成功載入 {self.total_data_count} 筆HEX資料")
             
             return True
             
@@ -88,6 +185,45 @@ class SenderController:
             print(f"載入HEX檔案失敗: {str(e)}")
             return False
     
+    def _clear_packed_data(self):
+        """
+        釋放傳統模式載入的資料
+        """
+        self._blob = bytearray()
+        self._index = array('I')
+        self._tags = array('b')
+        self._hex_strings = []
+    
+    def _close_parser(self):
+        """
+        釋放記憶體效率模式持續開啟的解析器
+        """
+        if self._parser is not None:
+            self._parser.close()
+            self._parser = None
+    
+    @staticmethod
+    def _classify_packet(data: Union[bytes, bytearray], start: int = 0, end: Optional[int] = None) -> int:
+        """
+        依開頭四個bytes判斷數據包類型
+        
+        Args:
+            data: HEX資料bytes，或存放多筆資料的連續緩衝
+            start: 資料在data中的起始位置
+            end: 資料在data中的結束位置，None表示到結尾
+            
+        Returns:
+            int: PACKET_TAG_* 類型值
+        """
+        # startswith在C層級直接比對，不切片也不配置新的bytes物件；
+        # 以end限制範圍，不足四個bytes的資料不會比對到下一筆的內容
+        if end is None:
+            end = len(data)
+        for header, tag in _PACKET_TAG_ITEMS:
+            if data.startswith(header, start, end):
+                return tag
+        return PACKET_TAG_OTHER
+    
     def set_progress_callback(self, callback: Callable):
         """
         設定進度更新回調函數
@@ -115,269 +251,473 @@ class SenderController:
         """
         self.on_cycle_complete_callback = callback
     
-    def start_sending(self, continuous: bool = True):
+    def set_send_complete_callback(self, callback: Callable):
         """
-        開始發送資料
+        設定發送結束回調函數，在發送停止或單次發送完成後呼叫
+        
+        Args:
+            callback: 回調函數，不接收參數
+        """
+        self.on_send_complete_callback = callback
+    
+    def start_sending(self, continuous: bool = True) -> Optional[threading.Event]:
+        """
+        開始發送資料，單次與循環模式都在背景執行緒執行，呼叫端不會被阻塞
         
         Args:
             continuous: True為循環發送，False為發送一次
+            
+        Returns:
+            Optional[threading.Event]: 發送結束時設定的事件，無法開始發送時返回None
         """
-        if not self.hex_data and not self.use_memory_efficient:
-            print("錯誤: 沒有載入HEX資料")
-            return
-        elif self.use_memory_efficient and self.total_data_count == 0:
+        if self.total_data_count == 0:
             print("錯誤: 沒有載入HEX資料")
-            return
+            return None
             
         if not self.rs485_comm.is_connected:
             print("錯誤: RS485未連接")
-            return
+            return None
             
-        self.is_running = True
-        self.is_paused = False
-        
-        if continuous:
-            # 在新執行緒中執行循環發送
-            self.send_thread = threading.Thread(target=self._continuous_send_loop)
-            self.send_thread.daemon = True
-            self.send_thread.start()
-        else:
-            # 發送一輪
-            self._send_one_cycle()
-            self.is_running = False
+        self._pause_evt.set()
+        self._stop_evt.clear()
+        self._last_progress_cb_time = 0.0
+        self._start_log_worker()
+        
+        finished = threading.Event()
+        send_thread = threading.Thread(target=self._run, args=(continuous, finished))
+        send_thread.daemon = True
+        send_thread.start()
+        self.send_thread = send_thread
+        return finished
     
     def stop_sending(self):
         """
-        停止發送
+        停止發送，同時喚醒暫停中或延遲等待中的發送執行緒
         """
-        self.is_running = False
-        self.is_paused = False
+        self._stop_evt.set()
+        self._pause_evt.set()
     
     def pause_sending(self):
         """
         暫停發送
         """
-        self.is_paused = True
+        self._pause_evt.clear()
     
     def resume_sending(self):
         """
         恢復發送
         """
-        self.is_paused = False
+        self._pause_evt.set()
     
-    def _continuous_send_loop(self):
+    def _run(self, continuous: bool, finished: threading.Event):
         """
-        循環發送主迴圈
+        發送執行緒主迴圈：發送一輪，循環模式下重複直到停止
+        
+        Args:
+            continuous: True為循環發送，False為發送一次
+            finished: 發送結束時設定
         """
-        while self.is_running:
-            if not self.is_paused:
+        stop_evt = self._stop_evt
+        pause_evt = self._pause_evt
+        try:
+            while not stop_evt.is_set():
+                # 暫停時阻塞等待，恢復或停止時立即返回
+                pause_evt.wait()
+                if stop_evt.is_set():
+                    break
+                
                 self._send_one_cycle()
                 
+                if not continuous:
+                    break
+                
                 # 循環完成回調
                 if self.on_cycle_complete_callback:
                     self.on_cycle_complete_callback(self.cycle_count)
-            else:
-                # 暫停時短暫休眠
-                time.sleep(0.1)
+        finally:
+            # 先輸出剩餘記錄再標記停止：呼叫端看到is_running為False時，記錄已全部輸出
+            self._drain_timing_log()
+            stop_evt.set()
+            self._notify_send_complete()
+            finished.set()
+    
+    def _notify_send_complete(self):
+        """
+        通知發送已結束
+        """
+        if self.on_send_complete_callback:
+            self.on_send_complete_callback()
+    
+    def _sleep_until(self, deadline: float) -> bool:
+        """
+        等待到指定的perf_counter時間點：大部分時間阻塞在停止事件上，
+        最後SPIN_MARGIN秒以perf_counter忙等，減少10ms級間隔的抖動
+        
+        Args:
+            deadline: 目標時間點 (time.perf_counter())
+            
+        Returns:
+            bool: 等到時間點返回True，等待期間被停止返回False
+        """
+        remaining = deadline - time.perf_counter()
+        if remaining > self.SPIN_THRESHOLD:
+            # 以Event.wait取代time.sleep，長延遲中停止發送可立即中斷
+            if self._stop_evt.wait(remaining - self.SPIN_MARGIN):
+                return False
+        while time.perf_counter() < deadline:
+            pass
+        return True
+    
+    def _log_timing(self, timestamp: float, message: str, *args):
+        """
+        記錄一筆時間控制訊息，只放入佇列，不在發送迴圈中格式化或輸出；
+        呼叫端應先檢查DEBUG_TIMING，關閉時連參數都不必計算
+        
+        Args:
+            timestamp: 事件發生的time.time()時間
+            message: %格式的訊息字串
+            *args: 訊息參數
+        """
+        self._log_q.append((timestamp, message, args))
+    
+    def _start_log_worker(self):
+        """
+        啟動背景執行緒，定期批次輸出時間控制記錄
+        """
+        if not DEBUG_TIMING or (self._log_thread and self._log_thread.is_alive()):
+            return
+        self._log_thread = threading.Thread(target=self._log_worker)
+        self._log_thread.daemon = True
+        self._log_thread.start()
+    
+    def _log_worker(self):
+        """
+        背景輸出迴圈，發送期間每LOG_FLUSH_INTERVAL秒輸出一次累積的記錄
+        """
+        while not self._stop_evt.wait(self.LOG_FLUSH_INTERVAL):
+            self._drain_timing_log()
+        self._drain_timing_log()
+    
+    def _drain_timing_log(self):
+        """
+        將佇列中所有時間控制記錄以DEBUG等級交給logging輸出
+        """
+        with self._log_lock:
+            log_q = self._log_q
+            if not logger.isEnabledFor(logging.DEBUG):
+                log_q.clear()
+                return
+            while log_q:
+                timestamp, message, args = log_q.popleft()
+                sec = int(timestamp)
+                ms = int(timestamp * 1000) - sec * 1000
+                if sec != self._sec_cache[0]:
+                    self._sec_cache = (sec, time.strftime('%H:%M:%S', time.localtime(sec)))
+                logger.debug("[%s.%03d] " + message, self._sec_cache[1], ms, *args)
     
     def _send_one_cycle(self):
         """
         發送一個完整循環的資料
         """
-        if self.use_memory_efficient:
-            self._send_one_cycle_memory_efficient()
-        else:
-            self._send_one_cycle_traditional()
+        self._send_cycle_impl()
     
     def _send_one_cycle_traditional(self):
         """
         傳統模式：從記憶體發送一個完整循環的資料
         """
-        if not self.hex_data:
+        if self.total_data_count == 0:
             return
             
         self.cycle_count += 1
         
-        for i, (hex_bytes, delay_ms) in enumerate(self.hex_data):
-            if not self.is_running or self.is_paused:
-                break
-                
-            self.current_index = i + 1
-            
-            # 轉換為可讀字串格式
-            hex_string = ' '.join(f'{b:02X}' for b in hex_bytes)
-            
-            # 進度回調
-            if self.on_progress_callback:
-                self.on_progress_callback(
-                    self.current_index, 
-                    self.total_data_count, 
-                    self.cycle_count, 
-                    hex_string
+        # 以memoryview切片取得每筆資料，不複製內容；迴圈中常用的屬性先綁定為區域變數
+        view = memoryview(self._blob)
+        index = self._index
+        tags = self._tags
+        hex_strings = self._hex_strings
+        process = self._process_one_packet
+        stopped = self._stop_evt.is_set
+        not_paused = self._pause_evt.is_set
+        sent = 0
+        
+        try:
+            for i in range(self.total_data_count):
+                if stopped() or not not_paused():
+                    break
+                offset = index[i * 3]
+                sent += process(
+                    view[offset:offset + index[i * 3 + 1]], index[i * 3 + 2], hex_strings[i], tags[i], i
                 )
-            
-            # 檢查數據包類型並計算間隔延遲
-            current_time = time.time()
-            header = hex_bytes[:4]
-            calculated_delay = 0
-            
-            if header == b'\x60\x01\x13\x20':  # "60 01 13 20"
-                if self.last_60_01_13_20_time > 0:
-                    elapsed_since_last = (current_time - self.last_60_01_13_20_time) * 1000
-                    if elapsed_since_last < 1000:
-                        calculated_delay = 1000 - elapsed_since_last
-                        print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 20 間隔控制：距離上次 {elapsed_since_last:.1f}ms，需延遲 {calculated_delay:.1f}ms")
-                    else:
-                        print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 20 間隔控制：距離上次 {elapsed_since_last:.1f}ms，無需延遲")
-                else:
-                    print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 20 首次發送，無需延遲")
-            elif header == b'\x60\x01\x13\x30':  # "60 01 13 30" 
-                if self.last_60_01_13_30_time > 0:
-                    elapsed_since_last = (current_time - self.last_60_01_13_30_time) * 1000
-                    if elapsed_since_last < 10:
-                        calculated_delay = 10 - elapsed_since_last
-                        print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 30 間隔控制：距離上次 {elapsed_since_last:.1f}ms，需延遲 {calculated_delay:.1f}ms")
-                    else:
-                        print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 30 間隔控制：距離上次 {elapsed_since_last:.1f}ms，無需延遲")
-                else:
-                    print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 30 首次發送，無需延遲")
-            else:
-                calculated_delay = 10  # 其他數據包預設延遲10ms
-                print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 其他數據包，延遲 {calculated_delay}ms")
-            
-            # 執行計算出的延遲
-            if calculated_delay > 0:
-                delay_start_time = time.time()
-                time.sleep(calculated_delay / 1000.0)
-                transmission_start_time = time.time()
-                actual_delay = (transmission_start_time - delay_start_time) * 1000
-                print(f"[{time.strftime('%H:%M:%S', time.localtime(transmission_start_time))}.{int((transmission_start_time % 1) * 1000):03d}] 延遲結束 (實際: {actual_delay:.1f}ms)，開始傳送")
-            else:
-                transmission_start_time = time.time()
-                print(f"[{time.strftime('%H:%M:%S', time.localtime(transmission_start_time))}.{int((transmission_start_time % 1) * 1000):03d}] 無需延遲，直接開始傳送")
-            
-            # 發送資料
-            success = self.rs485_comm.send_data(hex_bytes)
-            
-            # 記錄傳送完成時間
-            transmission_end_time = time.time()
-            transmission_duration = (transmission_end_time - transmission_start_time) * 1000
-            print(f"[{time.strftime('%H:%M:%S', time.localtime(transmission_end_time))}.{int((transmission_end_time % 1) * 1000):03d}] 傳送完成 (傳送耗時: {transmission_duration:.1f}ms)")
-            
-            # 更新最後發送時間記錄
-            if header == b'\x60\x01\x13\x20':
-                self.last_60_01_13_20_time = transmission_end_time
-            elif header == b'\x60\x01\x13\x30':
-                self.last_60_01_13_30_time = transmission_end_time
-            
-            if success:
-                self.total_sent += 1
-            
-            # 資料發送回調
-            if self.on_data_sent_callback:
-                self.on_data_sent_callback(hex_string, success)
+        finally:
+            # 成功筆數在迴圈結束時才一次累加
+            self.total_sent += sent
         
         # 重置索引為下一輪準備
         self.current_index = 0
+        self._current_hex_string = ""
         
-    def _send_one_cycle_memory_efficient(self):
+    def _send_cycle_constant_cadence(self):
         """
-        記憶體效率模式：逐一讀取並發送資料
+        傳統模式的特化版本：檔案只含單一數據包類型、延遲都相同時使用，
+        省去每筆的類型分派與記錄判斷；開啟時間控制記錄時改用一般迴圈
         """
-        if not self.hex_filename:
+        if DEBUG_TIMING:
+            self._send_one_cycle_traditional()
+            return
+        if self.total_data_count == 0:
             return
             
         self.cycle_count += 1
         
+        view = memoryview(self._blob)
+        index = self._index
+        hex_strings = self._hex_strings
+        total = self.total_data_count
+        cycle_count = self.cycle_count
+        pkt_tag = self._tags[0]
+        interval = index[2] / 1000.0
+        
+        # 需間隔控制的類型從上次傳送完成起算；其他類型每筆傳送前固定延遲
+        paced = pkt_tag != PACKET_TAG_OTHER
+        last_send_times = self._last_send_times
+        last_end = last_send_times[pkt_tag] if paced else 0.0
+        
+        perf_counter = time.perf_counter
+        sleep_until = self._sleep_until
+        send_data = self.rs485_comm.send_data
+        stopped = self._stop_evt.is_set
+        not_paused = self._pause_evt.is_set
+        progress_cb = self.on_progress_callback
+        sent_cb = self.on_data_sent_callback
+        progress_interval = self.PROGRESS_CALLBACK_INTERVAL
+        sent = 0
+        
         try:
-            parser = HexParser(self.hex_filename)
-            i = 0
-            
-            for hex_bytes, delay_ms in parser.parse_file_generator():
-                if not self.is_running or self.is_paused:
+            for i in range(total):
+                if stopped() or not not_paused():
                     break
-                    
-                i += 1
-                self.current_index = i
-                
-                # 轉換為可讀字串格式
-                hex_string = ' '.join(f'{b:02X}' for b in hex_bytes)
                 
-                # 進度回調
-                if self.on_progress_callback:
-                    self.on_progress_callback(
-                        self.current_index, 
-                        self.total_data_count, 
-                        self.cycle_count, 
-                        hex_string
-                    )
+                hex_string = hex_strings[i]
+                current_index = self.current_index = i + 1
+                self._current_hex_string = hex_string
                 
-                # 檢查數據包類型並計算間隔延遲
-                current_time = time.time()
-                header = hex_bytes[:4]
-                calculated_delay = 0
+                # 進度回調：與一般迴圈相同，限制在約10Hz，每輪最後一筆一定回調
+                if progress_cb:
+                    progress_time = perf_counter()
+                    if (progress_time - self._last_progress_cb_time >= progress_interval
+                            or current_index == total):
+                        self._last_progress_cb_time = progress_time
+                        progress_cb(current_index, total, cycle_count, hex_string)
                 
-                if header == b'\x60\x01\x13\x20':  # "60 01 13 20"
-                    if self.last_60_01_13_20_time > 0:
-                        elapsed_since_last = (current_time - self.last_60_01_13_20_time) * 1000
-                        if elapsed_since_last < 1000:
-                            calculated_delay = 1000 - elapsed_since_last
-                            print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 20 間隔控制：距離上次 {elapsed_since_last:.1f}ms，需延遲 {calculated_delay:.1f}ms")
-                        else:
-                            print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 20 間隔控制：距離上次 {elapsed_since_last:.1f}ms，無需延遲")
-                    else:
-                        print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 20 首次發送，無需延遲")
-                elif header == b'\x60\x01\x13\x30':  # "60 01 13 30" 
-                    if self.last_60_01_13_30_time > 0:
-                        elapsed_since_last = (current_time - self.last_60_01_13_30_time) * 1000
-                        if elapsed_since_last < 10:
-                            calculated_delay = 10 - elapsed_since_last
-                            print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 30 間隔控制：距離上次 {elapsed_since_last:.1f}ms，需延遲 {calculated_delay:.1f}ms")
-                        else:
-                            print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 30 間隔控制：距離上次 {elapsed_since_last:.1f}ms，無需延遲")
-                    else:
-                        print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 60 01 13 30 首次發送，無需延遲")
+                if paced:
+                    # 首次發送不需延遲
+                    deadline = last_end + interval if last_end > 0 else 0.0
                 else:
-                    calculated_delay = 10  # 其他數據包預設延遲10ms
-                    print(f"[{time.strftime('%H:%M:%S', time.localtime(current_time))}.{int((current_time % 1) * 1000):03d}] 其他數據包，延遲 {calculated_delay}ms")
-                
-                # 執行計算出的延遲
-                if calculated_delay > 0:
-                    delay_start_time = time.time()
-                    time.sleep(calculated_delay / 1000.0)
-                    transmission_start_time = time.time()
-                    actual_delay = (transmission_start_time - delay_start_time) * 1000
-                    print(f"[{time.strftime('%H:%M:%S', time.localtime(transmission_start_time))}.{int((transmission_start_time % 1) * 1000):03d}] 延遲結束 (實際: {actual_delay:.1f}ms)，開始傳送")
-                else:
-                    transmission_start_time = time.time()
-                    print(f"[{time.strftime('%H:%M:%S', time.localtime(transmission_start_time))}.{int((transmission_start_time % 1) * 1000):03d}] 無需延遲，直接開始傳送")
-                
-                # 發送資料
-                success = self.rs485_comm.send_data(hex_bytes)
-                
-                # 記錄傳送完成時間
-                transmission_end_time = time.time()
-                transmission_duration = (transmission_end_time - transmission_start_time) * 1000
-                print(f"[{time.strftime('%H:%M:%S', time.localtime(transmission_end_time))}.{int((transmission_end_time % 1) * 1000):03d}] 傳送完成 (傳送耗時: {transmission_duration:.1f}ms)")
-                
-                # 更新最後發送時間記錄
-                if header == b'\x60\x01\x13\x20':
-                    self.last_60_01_13_20_time = transmission_end_time
-                elif header == b'\x60\x01\x13\x30':
-                    self.last_60_01_13_30_time = transmission_end_time
+                    deadline = perf_counter() + interval
+                if deadline > 0 and not sleep_until(deadline):
+                    break
                 
+                offset = index[i * 3]
+                success = send_data(view[offset:offset + index[i * 3 + 1]], flush=True)
+                if not success:
+                    # 部分寫入的殘留資料會排在下一筆之前送出，先清除
+                    self.rs485_comm.reset_buffers()
+                last_end = perf_counter()
                 if success:
-                    self.total_sent += 1
+                    sent += 1
                 
-                # 資料發送回調
-                if self.on_data_sent_callback:
-                    self.on_data_sent_callback(hex_string, success)
+                if sent_cb:
+                    sent_cb(hex_string, success)
+        finally:
+            if paced:
+                last_send_times[pkt_tag] = last_end
+            self.total_sent += sent
+        
+        # 重置索引為下一輪準備
+        self.current_index = 0
+        self._current_hex_string = ""
+        
+    def _send_one_cycle_memory_efficient(self):
+        """
+        記憶體效率模式：逐一讀取並發送資料
+        """
+        parser = self._parser
+        if parser is None:
+            return
+            
+        # 回到檔案開頭；檔案在發送期間被改寫時重新開啟並更新總筆數
+        try:
+            if parser.rewind():
+                self.total_data_count = parser.count_records()
+        except Exception as e:
+            print(f"記憶體效率模式發送錯誤: {str(e)}")
+            return
+        
+        self.cycle_count += 1
+        
+        # 解析與格式化在背景執行緒進行，與發送端的間隔等待重疊
+        record_q = queue.Queue(maxsize=self.PRODUCER_QUEUE_SIZE)
+        cancel = threading.Event()
+        producer = threading.Thread(
+            target=self._parser_producer, args=(parser, record_q, cancel), daemon=True
+        )
+        producer.start()
+        
+        get_record = record_q.get
+        process = self._process_one_packet
+        stopped = self._stop_evt.is_set
+        not_paused = self._pause_evt.is_set
+        sent = 0
+        
+        try:
+            i = 0
+            while not stopped() and not_paused():
+                try:
+                    record = get_record(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if record is None:
+                    break
+                if isinstance(record, Exception):
+                    raise record
+                
+                hex_bytes, delay_ms, hex_string, pkt_tag = record
+                sent += process(hex_bytes, delay_ms, hex_string, pkt_tag, i)
+                i += 1
             
             # 重置索引為下一輪準備
             self.current_index = 0
+            self._current_hex_string = ""
             
         except Exception as e:
             print(f"記憶體效率模式發送錯誤: {str(e)}")
+        finally:
+            self.total_sent += sent
+            cancel.set()
+            producer.join()
+    
+    def _parser_producer(self, parser: HexParser, record_q: queue.Queue, cancel: threading.Event):
+        """
+        解析執行緒：逐筆解析檔案並放入佇列，結束時放入None；
+        解析錯誤以例外物件傳給發送端處理
+        
+        Args:
+            parser: 持續開啟的解析器
+            record_q: 與發送迴圈共用的有界佇列
+            cancel: 發送端提前結束時設定，通知解析執行緒停止
+        """
+        def put(item) -> bool:
+            # 佇列已滿時定期檢查是否已取消，避免發送端離開後永遠阻塞
+            while not cancel.is_set():
+                try:
+                    record_q.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        try:
+            # 發送端已呼叫rewind()，同一個解析器從開頭重新走訪，檔案未變更時重複使用mmap
+            for hex_bytes, delay_ms in parser:
+                # 轉換為可讀字串格式
+                record = (hex_bytes, delay_ms, hex_bytes.hex(' ').upper(), self._classify_packet(hex_bytes))
+                if not put(record):
+                    return
+        except Exception as e:
+            put(e)
+            return
+        put(None)
+    
+    def _process_one_packet(self, hex_bytes: BufferLike, delay_ms: int, hex_string: str, pkt_tag: int, i: int) -> bool:
+        """
+        發送單筆資料：進度回調、間隔延遲、傳送、更新上次傳送時間及發送回調，
+        傳統模式與記憶體效率模式共用
+        
+        Args:
+            hex_bytes: 要發送的資料
+            delay_ms: 解析器給出的延遲/間隔下限(毫秒)
+            hex_string: 資料的HEX字串，供回調顯示
+            pkt_tag: 數據包類型 (PACKET_TAG_*)
+            i: 資料在本輪循環中的索引 (0-based)
+            
+        Returns:
+            bool: 發送成功返回True；成功筆數由呼叫端在迴圈結束時累加到total_sent
+        """
+        perf_counter = time.perf_counter
+        current_index = self.current_index = i + 1
+        self._current_hex_string = hex_string
+        
+        # 進度回調：限制在約10Hz，顯示端不必每筆都重新格式化與輸出
+        progress_cb = self.on_progress_callback
+        if progress_cb:
+            progress_time = perf_counter()
+            if (progress_time - self._last_progress_cb_time >= self.PROGRESS_CALLBACK_INTERVAL
+                    or current_index == self.total_data_count):
+                self._last_progress_cb_time = progress_time
+                progress_cb(
+                    current_index, 
+                    self.total_data_count, 
+                    self.cycle_count, 
+                    hex_string
+                )
+        
+        # 依預先分類的數據包類型計算間隔延遲，間隔下限即解析器給出的delay_ms
+        # 間隔以perf_counter（高解析度單調時鐘）計算，不受系統時間調整影響；牆上時間只用於記錄
+        now = perf_counter()
+        
+        if pkt_tag == PACKET_TAG_OTHER:
+            calculated_delay = float(delay_ms)  # 其他數據包固定延遲
+            if DEBUG_TIMING:
+                self._log_timing(time.time(), "其他數據包，延遲 %dms", delay_ms)
+        else:
+            last_send_times = self._last_send_times
+            last_send_time = last_send_times[pkt_tag]
+            calculated_delay = 0.0
+            if last_send_time > 0:
+                elapsed_since_last = (now - last_send_time) * 1000
+                if elapsed_since_last < delay_ms:
+                    calculated_delay = delay_ms - elapsed_since_last
+                    if DEBUG_TIMING:
+                        self._log_timing(time.time(), "%s 間隔控制：距離上次 %.1fms，需延遲 %.1fms", _PACKET_LABELS[pkt_tag], elapsed_since_last, calculated_delay)
+                elif DEBUG_TIMING:
+                    self._log_timing(time.time(), "%s 間隔控制：距離上次 %.1fms，無需延遲", _PACKET_LABELS[pkt_tag], elapsed_since_last)
+            elif DEBUG_TIMING:
+                self._log_timing(time.time(), "%s 首次發送，無需延遲", _PACKET_LABELS[pkt_tag])
+        
+        # 執行計算出的延遲：依截止時間計算剩餘等待，扣除上方處理已花費的時間
+        if calculated_delay > 0:
+            deadline = now + calculated_delay / 1000.0
+            if not self._sleep_until(deadline):
+                # 延遲期間已停止發送，不再傳送本筆
+                return False
+            if DEBUG_TIMING:
+                actual_delay = (perf_counter() - now) * 1000
+                self._log_timing(time.time(), "延遲結束 (實際: %.1fms)，開始傳送", actual_delay)
+        elif DEBUG_TIMING:
+            self._log_timing(time.time(), "無需延遲，直接開始傳送")
+        
+        # 發送資料（同步等待傳送完畢，間隔控制以實際傳送完成時間計算）
+        send_start = perf_counter()
+        success = self.rs485_comm.send_data(hex_bytes, flush=True)
+        if not success:
+            # 部分寫入的殘留資料會排在下一筆之前送出，先清除
+            self.rs485_comm.reset_buffers()
+        
+        # 記錄傳送完成時間
+        send_end = perf_counter()
+        if DEBUG_TIMING:
+            self._log_timing(time.time(), "傳送完成 (傳送耗時: %.1fms)", (send_end - send_start) * 1000)
+        
+        # 更新最後發送時間記錄
+        if pkt_tag != PACKET_TAG_OTHER:
+            last_send_times[pkt_tag] = send_end
+        
+        # 資料發送回調
+        sent_cb = self.on_data_sent_callback
+        if sent_cb:
+            sent_cb(hex_string, success)
+        
+        return success
     
     def get_status(self) -> dict:
         """
@@ -403,7 +743,4 @@ class SenderController:
         Returns:
             str: 目前的HEX字串
         """
-        if 0 <= self.current_index - 1 < len(self.hex_data):
-            hex_bytes, _ = self.hex_data[self.current_index - 1]
-            return ' '.join(f'{b:02X}' for b in hex_bytes)
-        return ""
\ No newline at end of file
+        return self._current_hex_string
\ No newline at end of file
@@ -0,0 +1,25 @@
+"""
+選用的編譯設定
+以mypyc將熱路徑模組編譯為C擴充模組，減少直譯器負擔
+
+使用方式:
+    pip install mypy
+    python setup.py build_ext --inplace
+
+編譯產生的 .so 與原始 .py 位於同一目錄時，Python會優先載入編譯版本；
+刪除 .so 即回到純Python版本，程式不需任何修改
+"""
+
+from setuptools import setup
+from mypyc.build import mypycify
+
+
+setup(
+    name='rs485-hex-sender',
+    ext_modules=mypycify([
+        # pyserial沒有附型別資訊，rs485_comm不編譯，只需略過其匯入檢查
+        '--ignore-missing-imports',
+        'hex_parser.py',
+        'sender_controller.py',
+    ]),
+)